@@ -8,6 +8,7 @@ import mlflow.sklearn
 from mlflow.tracking import MlflowClient
 import logging
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import joblib
 from typing import Dict, List, Optional
@@ -15,6 +16,17 @@ from typing import Dict, List, Optional
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# search_runs columns reported in the performance history, and their names there
+PERFORMANCE_COLUMNS = {
+    "params.contamination": "contamination",
+    "params.n_features": "n_features",
+    "params.n_samples": "n_samples",
+    "metrics.anomaly_rate": "anomaly_rate",
+    "metrics.mean_anomaly_score": "mean_anomaly_score",
+    "metrics.std_anomaly_score": "std_anomaly_score",
+    "metrics.n_anomalies_detected": "n_anomalies_detected",
+}
+
 class ModelRegistry:
     """
     Manages model lifecycle using MLflow Model Registry
@@ -126,14 +138,15 @@ class ModelRegistry:
             logger.error(f"Failed to load staging model: {e}")
             return None
     
-    def compare_models(self, version1: str, version2: str, test_data: pd.DataFrame) -> Dict:
+    def compare_models(self, version1: str, version2: str, X: np.ndarray) -> Dict:
         """
         Compare two model versions on test data
         
         Args:
             version1: First model version
             version2: Second model version  
-            test_data: Test dataset for comparison
+            X: Test feature matrix of shape (n_samples, n_features); convert
+               DataFrames with .to_numpy() before calling
             
         Returns:
             Comparison metrics
@@ -147,26 +160,24 @@ class ModelRegistry:
             model2 = mlflow.sklearn.load_model(model2_uri)
             
             # Get predictions
-            pred1 = model1.predict(test_data)
-            pred2 = model2.predict(test_data)
-            
-            scores1 = model1.decision_function(test_data)
-            scores2 = model2.decision_function(test_data)
+            pred1 = model1.predict(X)
+            pred2 = model2.predict(X)
             
-            # Calculate metrics
-            anomaly_rate1 = (pred1 == -1).sum() / len(test_data)
-            anomaly_rate2 = (pred2 == -1).sum() / len(test_data)
+            scores1 = model1.decision_function(X)
+            scores2 = model2.decision_function(X)
             
+            # Calculate metrics (all vectorized over the full test set)
             comparison = {
                 "version1": version1,
                 "version2": version2,
-                "version1_anomaly_rate": anomaly_rate1,
-                "version2_anomaly_rate": anomaly_rate2,
-                "version1_mean_score": scores1.mean(),
-                "version2_mean_score": scores2.mean(),
-                "version1_std_score": scores1.std(),
-                "version2_std_score": scores2.std(),
-                "agreement_rate": (pred1 == pred2).mean()
+                "version1_anomaly_rate": float((pred1 == -1).mean()),
+                "version2_anomaly_rate": float((pred2 == -1).mean()),
+                "version1_mean_score": float(scores1.mean()),
+                "version2_mean_score": float(scores2.mean()),
+                "version1_std_score": float(scores1.std()),
+                "version2_std_score": float(scores2.std()),
+                "mean_score_difference": float(np.abs(scores1 - scores2).mean()),
+                "agreement_rate": float((pred1 == pred2).mean())
             }
             
             logger.info(f"Model comparison completed: {comparison}")
@@ -212,30 +223,27 @@ class ModelRegistry:
         """
         try:
             versions = self.get_model_versions()
-            performance_data = []
+            if not versions:
+                return pd.DataFrame()
             
-            for version_info in versions:
-                run_id = version_info["run_id"]
-                run = self.client.get_run(run_id)
-                
-                metrics = run.data.metrics
-                params = run.data.params
-                
-                performance_data.append({
-                    "version": version_info["version"],
-                    "stage": version_info["stage"],
-                    "run_id": run_id,
-                    "creation_time": datetime.fromtimestamp(version_info["creation_time"] / 1000),
-                    "contamination": params.get("contamination", None),
-                    "n_features": params.get("n_features", None),
-                    "n_samples": params.get("n_samples", None),
-                    "anomaly_rate": metrics.get("anomaly_rate", None),
-                    "mean_anomaly_score": metrics.get("mean_anomaly_score", None),
-                    "std_anomaly_score": metrics.get("std_anomaly_score", None),
-                    "n_anomalies_detected": metrics.get("n_anomalies_detected", None)
-                })
+            # Fetch every version's run in one search instead of a get_run per version
+            versions_df = pd.DataFrame(versions)
+            run_ids = ", ".join(f"'{run_id}'" for run_id in versions_df["run_id"].unique())
+            runs_df = mlflow.search_runs(
+                filter_string=f"attributes.run_id IN ({run_ids})",
+                search_all_experiments=True
+            )
+            runs_df = runs_df.reindex(
+                columns=["run_id", *PERFORMANCE_COLUMNS]
+            ).rename(columns=PERFORMANCE_COLUMNS)
             
-            return pd.DataFrame(performance_data)
+            history = versions_df[["version", "stage", "run_id", "creation_time"]].merge(
+                runs_df, on="run_id", how="left"
+            )
+            history["creation_time"] = history["creation_time"].map(
+                lambda ms: datetime.fromtimestamp(ms / 1000)
+            )
+            return history
             
         except Exception as e:
             logger.error(f"Failed to get performance history: {e}")
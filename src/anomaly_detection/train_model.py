@@ -18,7 +18,7 @@ mlflow.set_tracking_uri("http://localhost:5000")
 mlflow.set_experiment("blockchain_anomaly_detection")
 
 def train_anomaly_model(features: pd.DataFrame, model_path: str = "../../models/anomaly_model.pkl", 
-                       contamination: float = 0.01, random_state: int = 42):
+                       contamination: float = 0.01, random_state: int = 42, n_estimators: int = 100):
     """
     Train anomaly detection model with MLflow tracking
     """
@@ -27,17 +27,23 @@ def train_anomaly_model(features: pd.DataFrame, model_path: str = "../../models/
         mlflow.log_param("algorithm", "IsolationForest")
         mlflow.log_param("contamination", contamination)
         mlflow.log_param("random_state", random_state)
+        mlflow.log_param("n_estimators", n_estimators)
         mlflow.log_param("n_features", features.shape[1])
         mlflow.log_param("n_samples", features.shape[0])
         mlflow.log_param("feature_columns", list(features.columns))
         
         # Train model
-        model = IsolationForest(contamination=contamination, random_state=random_state)
+        model = IsolationForest(
+            n_estimators=n_estimators,
+            contamination=contamination,
+            random_state=random_state
+        )
         model.fit(features)
         
         # Evaluate model
         scores = model.decision_function(features)
-        predictions = model.predict(features)
+        # Same rule as IsolationForest.predict, without scoring the data a second time
+        predictions = np.where(scores < 0, -1, 1)
         n_anomalies = (predictions == -1).sum()
         anomaly_rate = n_anomalies / len(features)
         
@@ -14,7 +14,7 @@ from prometheus_client import start_http_server
 import joblib
 from src.anomaly_detection.feature_extraction import extract_features_from_transaction
 from src.anomaly_detection.alerting import send_alert
-from src.whale_tracker.whale_alerting import send_whale_alert
+from src.whale_tracker.whale_alerting import send_whale_alert, close_whale_log
 
 from .websocket_client import BlockchainWebSocketClient
 from .message_queue import RedisMessageQueue, MessageProcessor
@@ -180,6 +180,9 @@ class DataPipeline:
         if self.message_queue:
             await self.message_queue.disconnect()
         
+        # Flush whale event log
+        close_whale_log()
+        
         logger.info("Data pipeline stopped")
 
 
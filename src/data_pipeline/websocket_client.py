@@ -5,10 +5,10 @@ Handles real-time connection to Blockchain.info WebSocket API
 """
 
 import asyncio
-import json
 import logging
 from typing import Any, Callable, Dict, Optional
 
+import orjson
 import websockets
 from prometheus_client import Counter, Histogram
 
@@ -31,6 +31,11 @@ message_processing_time = Histogram(
     "Time spent processing messages"
 )
 
+messages_dropped = Counter(
+    "blockchain_messages_dropped_total",
+    "Number of messages dropped unprocessed (queue full, or still pending at shutdown)"
+)
+
 
 class BlockchainWebSocketClient:
     """WebSocket client for Blockchain.info API"""
@@ -40,12 +45,16 @@ class BlockchainWebSocketClient:
         url: str = "wss://ws.blockchain.info/inv",
         message_handler: Optional[Callable[[Dict[str, Any]], None]] = None,
         reconnect_interval: int = 5,
-        max_reconnect_attempts: int = 10
+        max_reconnect_attempts: int = 10,
+        queue_size: int = 1024,
+        drain_timeout: float = 5.0
     ):
         self.url = url
         self.message_handler = message_handler
         self.reconnect_interval = reconnect_interval
         self.max_reconnect_attempts = max_reconnect_attempts
+        self.queue_size = queue_size
+        self.drain_timeout = drain_timeout
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
         self.is_connected = False
         self.reconnect_attempts = 0
@@ -80,7 +89,8 @@ class BlockchainWebSocketClient:
             return
             
         try:
-            await self.websocket.send(json.dumps(message))
+            # Sent as a text frame; the API does not accept binary frames
+            await self.websocket.send(orjson.dumps(message).decode())
             logger.debug(f"Sent message: {message}")
         except Exception as e:
             logger.error(f"Failed to send message: {e}")
@@ -121,14 +131,26 @@ class BlockchainWebSocketClient:
         logger.info("Unsubscribed from new blocks")
     
     async def listen(self) -> None:
-        """Listen for incoming messages"""
+        """Listen for incoming messages
+        
+        Frames are handed to a consumer task through a bounded queue so the
+        socket keeps draining while messages are processed. When the queue
+        is full new frames are dropped and counted instead of stalling reads.
+        When the socket stops, queued frames get drain_timeout seconds to be
+        processed before the consumer is stopped.
+        """
         if not self.websocket:
             logger.error("Not connected to WebSocket")
             return
-            
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        consumer = asyncio.create_task(self.consume(queue))
         try:
             async for message in self.websocket:
-                await self.process_message(message)
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    messages_dropped.inc()
         except websockets.exceptions.ConnectionClosed as e:
             logger.debug(f"WebSocket connection closed: {e}")
             self.is_connected = False
@@ -138,13 +160,44 @@ class BlockchainWebSocketClient:
             logger.error(f"Error in message listener: {e}")
             self.is_connected = False
             await self.handle_reconnect()
+        finally:
+            await self.drain(queue, consumer)
+    
+    async def consume(self, queue: asyncio.Queue) -> None:
+        """Process queued messages off the socket receive loop"""
+        while True:
+            message = await queue.get()
+            try:
+                await self.process_message(message)
+            except asyncio.CancelledError:
+                messages_dropped.inc()
+                raise
+            finally:
+                queue.task_done()
+    
+    async def drain(self, queue: asyncio.Queue, consumer: asyncio.Task) -> None:
+        """Let the consumer finish queued messages, then stop it"""
+        try:
+            await asyncio.wait_for(queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Queue not drained within {self.drain_timeout}s")
+        
+        consumer.cancel()
+        try:
+            await consumer
+        except asyncio.CancelledError:
+            pass
+        
+        # Anything still queued will never be processed
+        if not queue.empty():
+            messages_dropped.inc(queue.qsize())
     
     async def process_message(self, message: str) -> None:
         """Process incoming message"""
         start_time = asyncio.get_event_loop().time()
         
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             message_type = data.get("op", "unknown")
             
             # Update metrics
@@ -164,9 +217,9 @@ class BlockchainWebSocketClient:
             
             # Call custom message handler if provided
             if self.message_handler:
-                await asyncio.create_task(self.message_handler(data))
+                await self.message_handler(data)
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse message: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
@@ -1,40 +1,100 @@
 import csv
+import io
 import os
 import asyncio
+import threading
 from src.alerting.telegram_alert import send_telegram_alert_async
 
+WHALE_LOG_PATH = "whale_events.csv"
+_HEADER = b"hash,total_value_btc,fee,input_count,output_count,address\r\n"
+# Whale rows have a fixed schema of hashes, numbers and base58/bech32 addresses,
+# so they can be formatted directly instead of going through csv.writer
+_FMT = "{},{:.8f},{},{},{},{}\r\n".format
+# Characters that force csv.writer quoting
+_QUOTE_CHARS = frozenset(',"\r\n')
+_MSG_TMPL = "WHALE ALERT!\nHash: {h}\nValue: {v:.2f} BTC\nFee: {f}\nInputs: {i}\nOutputs: {o}\nAddress: {a}"
+
+
+def _format_row(hash_, total_value_btc, fee, n_in, n_out, addr) -> str:
+    """Format a whale CSV row, quoting via csv.writer only when a field needs it"""
+    addr = addr or ""
+    if not _QUOTE_CHARS.isdisjoint(addr):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(
+            [hash_, f"{total_value_btc:.8f}", fee, n_in, n_out, addr]
+        )
+        return buf.getvalue()
+    return _FMT(hash_, total_value_btc, fee, n_in, n_out, addr)
+
+
+# Whale logs are kept open as raw append-only descriptors, one per path
+_log_fds = {}
+_log_lock = threading.Lock()
+
+
+def _append_row(log_path: str, line: str):
+    """Append a formatted row to the whale log, writing the header for a new file"""
+    iov = [line.encode()]
+    with _log_lock:
+        fd = _log_fds.get(log_path)
+        if fd is None:
+            flags = os.O_APPEND | os.O_WRONLY | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+            fd = _log_fds[log_path] = os.open(log_path, flags, 0o644)
+            if os.fstat(fd).st_size == 0:
+                iov.insert(0, _HEADER)
+        if hasattr(os, "writev"):
+            os.writev(fd, iov)
+        else:  # Windows
+            os.write(fd, b"".join(iov))
+
+
+def close_whale_log():
+    """Flush and close any open whale log descriptors"""
+    with _log_lock:
+        for fd in _log_fds.values():
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        _log_fds.clear()
+
+
 async def send_whale_alert(tx: dict, threshold_btc: float, btc_per_satoshi: float = 1e-8):
-    total_value_btc = sum(out.get("value", 0) for out in tx.get("out", [])) * btc_per_satoshi
-    if total_value_btc >= threshold_btc:
-        print(f"WHALE ALERT: Transaction {tx.get('hash')} with value {total_value_btc:.2f} BTC")
-        # Extract first output address if available
-        address = None
-        outs = tx.get("out", [])
-        if outs and isinstance(outs, list):
-            address = outs[0].get("addr")
-        log_path = "whale_events.csv"
-        file_exists = os.path.isfile(log_path)
-        with open(log_path, "a", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            if not file_exists:
-                writer.writerow(["hash", "total_value_btc", "fee", "input_count", "output_count", "address"])
-            writer.writerow([
-                tx.get("hash"),
-                total_value_btc,
-                tx.get("fee", 0),
-                len(tx.get("inputs", [])),
-                len(outs),
-                address
-            ])
-        # Send Telegram alert
-        try:
-            message = f"WHALE ALERT!\nHash: {tx.get('hash')}\nValue: {total_value_btc:.2f} BTC\nFee: {tx.get('fee', 0)}\nInputs: {len(tx.get('inputs', []))}\nOutputs: {len(outs)}\nAddress: {address}"
-            success = await send_telegram_alert_async(message)
-            if success:
-                print("Telegram whale alert sent successfully")
-            else:
-                print("Failed to send Telegram whale alert")
-        except Exception as e:
-            print(f"Error sending Telegram whale alert: {e}")
-        return True
-    return False 
\ No newline at end of file
+    outs = tx.get("out") or []
+    # Compare in satoshis so non-whales return before any float conversion;
+    # feeds that pre-compute the output total skip the sum entirely
+    threshold_sat = round(threshold_btc / btc_per_satoshi)
+    total_sat = tx.get("out_total_sat")
+    if total_sat is None:
+        total_sat = 0
+        for out in outs:
+            total_sat += out.get("value", 0)
+    if total_sat < threshold_sat:
+        return False
+
+    hash_ = tx.get("hash")
+    fee = tx.get("fee", 0)
+    n_in = len(tx.get("inputs") or ())
+    n_out = len(outs)
+    total_value_btc = total_sat * btc_per_satoshi
+    print(f"WHALE ALERT: Transaction {hash_} with value {total_value_btc:.2f} BTC")
+    # Extract first output address if available
+    address = outs[0].get("addr") if outs and isinstance(outs, list) else None
+
+    line = _format_row(hash_, total_value_btc, fee, n_in, n_out, address)
+    message = _MSG_TMPL.format(h=hash_, v=total_value_btc, f=fee, i=n_in, o=n_out, a=address)
+    # Append to the CSV off the event loop while the Telegram send is in flight
+    write_result, telegram_result = await asyncio.gather(
+        asyncio.to_thread(_append_row, WHALE_LOG_PATH, line),
+        send_telegram_alert_async(message),
+        return_exceptions=True
+    )
+    if isinstance(write_result, Exception):
+        print(f"Error logging whale event: {write_result}")
+    if isinstance(telegram_result, Exception):
+        print(f"Error sending Telegram whale alert: {telegram_result}")
+    elif telegram_result:
+        print("Telegram whale alert sent successfully")
+    else:
+        print("Failed to send Telegram whale alert")
+    return True
\ No newline at end of file
@@ -13,6 +13,8 @@ import sys
 import time
 import subprocess
 import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
@@ -21,6 +23,9 @@ print("Python executable:", sys.executable)
 # Add project root to path
 sys.path.append(str(Path(__file__).parent))
 
+# Set AUTOMATION_FAST_FAIL=1 (e.g. in CI) to stop the dependency check at the first miss
+FAST_FAIL = os.environ.get("AUTOMATION_FAST_FAIL") == "1"
+
 def print_banner():
     """Print startup banner"""
     print("\n" + "=" * 80)
@@ -29,8 +34,35 @@ def print_banner():
     print(f"[*] Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"[*] Working Directory: {os.getcwd()}")
     print(f"[*] Python Version: {sys.version.split()[0]}")
+    if FAST_FAIL:
+        print("[*] Fast-fail mode: AUTOMATION_FAST_FAIL=1 (stop at first missing dependency)")
     print("=" * 80)
 
+def _import_error(import_name):
+    """Import a module, returning the exception it raised (or None) instead of raising"""
+    try:
+        importlib.import_module(import_name)
+    except Exception as e:
+        return e
+    return None
+
+def _import_results(package_import_map):
+    """Yield (install_name, error) pairs as each dependency import finishes"""
+    if FAST_FAIL:
+        # One at a time, so stopping at the first failure really skips the rest
+        for install_name, import_name in package_import_map.items():
+            yield install_name, _import_error(import_name)
+        return
+    
+    # Import concurrently - cold imports are dominated by disk reads
+    with ThreadPoolExecutor(max_workers=len(package_import_map)) as pool:
+        futures = {
+            pool.submit(_import_error, import_name): install_name
+            for install_name, import_name in package_import_map.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
 def check_dependencies():
     """Check if required dependencies are installed"""
     print("\n[*] Checking Dependencies...")
@@ -49,28 +81,43 @@ def check_dependencies():
     
     missing_packages = []
     
-    for install_name, import_name in package_import_map.items():
-        try:
-            __import__(import_name)
+    for install_name, error in _import_results(package_import_map):
+        if error is None:
             print(f"  [+] {install_name}")
-        except ImportError:
-            print(f"  [-] {install_name} (missing)")
-            missing_packages.append(install_name)
+            continue
+        
+        # Installed but failing to import (e.g. a broken C extension) is just as fatal
+        status = "missing" if isinstance(error, ImportError) else f"broken: {error}"
+        print(f"  [-] {install_name} ({status})")
+        missing_packages.append(install_name)
+        if FAST_FAIL:
+            break
     
     if missing_packages:
-        print(f"\n[!] Missing packages: {', '.join(missing_packages)}")
+        print(f"\n[!] Missing or broken packages: {', '.join(missing_packages)}")
         print("Please install them using: pip install " + " ".join(missing_packages))
         return False
     
     print("[+] All dependencies are installed!")
     return True
 
+_stat_cache = {}
+
+def _path_exists(path):
+    """Stat a path once and cache the result for later startup steps"""
+    if path not in _stat_cache:
+        try:
+            _stat_cache[path] = os.stat(path)
+        except OSError:
+            _stat_cache[path] = None
+    return _stat_cache[path] is not None
+
 def check_environment():
     """Check environment setup"""
     print("\n[*] Checking Environment...")
     
     # Check .env file
-    if os.path.exists(".env"):
+    if _path_exists(".env"):
         print("  [+] .env file found")
     else:
         print("  [\!]  .env file not found")
@@ -94,40 +141,64 @@ def check_environment():
         "monitoring_data"
     ]
     
+    # Scan each parent directory once instead of stat-ing every child
+    listings = {}
     for dir_path in required_dirs:
-        if os.path.exists(dir_path):
+        parent, name = os.path.split(dir_path)
+        parent = parent or "."
+        if parent not in listings:
+            try:
+                with os.scandir(parent) as entries:
+                    listings[parent] = {e.name for e in entries}
+            except OSError:
+                listings[parent] = set()
+        
+        if name in listings[parent]:
             print(f"  [+] {dir_path}")
         else:
             print(f"  [*] Creating {dir_path}")
             os.makedirs(dir_path, exist_ok=True)
+            listings[parent].add(name)
+            listings[dir_path] = set()
     
     # Check model file
-    if os.path.exists("models/anomaly_model.pkl"):
+    if _path_exists("models/anomaly_model.pkl"):
         print("  [+] ML model found")
     else:
         print("  [\!]  ML model not found - will be trained automatically")
     
     return True
 
+PREFECT_API_URL = "http://localhost:4200/api"
+# The agent exposes no readiness signal, so give it this long to fail on startup
+AGENT_STARTUP_GRACE = 5
+
+def _prefect_up():
+    """Return True if the Prefect server health endpoint responds"""
+    import httpx  # shipped with prefect, imported lazily so check_dependencies reports it
+    
+    try:
+        return httpx.get(f"{PREFECT_API_URL}/health", timeout=1.0).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+def _wait_until(predicate, timeout, interval=0.25):
+    """Poll predicate until it returns True or timeout seconds elapse"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
 def start_prefect_server():
     """Start Prefect server"""
     print("\n[*] Starting Prefect Server...")
     
-    try:
-        # Check if server is already running
-        result = subprocess.run(
-            ["prefect", "server", "database", "reset", "--help"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            print("  [+] Prefect server is already accessible")
-            return True
-        
-    except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-        pass
+    # Check if server is already running
+    if _prefect_up():
+        print("  [+] Prefect server is already accessible")
+        return True
     
     # Start server
     try:
@@ -138,9 +209,9 @@ def start_prefect_server():
             stderr=subprocess.PIPE
         )
         
-        # Wait for server to start
+        # Wait for server to start (or exit early, e.g. port already in use)
         print("  [*] Waiting for server to start...")
-        time.sleep(10)
+        _wait_until(lambda: server_process.poll() is not None or _prefect_up(), timeout=15)
         
         # Check if server is running
         if server_process.poll() is None:
@@ -167,29 +238,6 @@ def start_prefect_server():
         print(f"  [-] Error starting Prefect server: {e}")
         return False
 
-def deploy_workflows():
-    """Deploy automation workflows"""
-    print("\n[*] Deploying Workflows...")
-    
-    try:
-        from automation.deployments.deploy_flows import deploy_all
-        
-        print("  [*] Deploying automation flows...")
-        deployment_ids = deploy_all()
-        
-        if deployment_ids:
-            print(f"  [+] Successfully deployed {len(deployment_ids)} workflows")
-            for i, dep_id in enumerate(deployment_ids, 1):
-                print(f"    {i}. {dep_id}")
-            return True
-        else:
-            print("  [-] No workflows were deployed")
-            return False
-            
-    except Exception as e:
-        print(f"  [-] Error deploying workflows: {e}")
-        return False
-
 def start_prefect_agent():
     """Start Prefect agent"""
     print("\n[*] Starting Prefect Agent...")
@@ -202,8 +250,8 @@ def start_prefect_agent():
             stderr=subprocess.PIPE
         )
         
-        # Wait for agent to start
-        time.sleep(5)
+        # Wait out the grace period, returning early only if the agent exits
+        _wait_until(lambda: agent_process.poll() is not None, timeout=AGENT_STARTUP_GRACE)
         
         if agent_process.poll() is None:
             print("  [+] Prefect agent started successfully")
@@ -216,26 +264,51 @@ def start_prefect_agent():
         print(f"  [-] Error starting Prefect agent: {e}")
         return False
 
-def run_initial_health_check():
-    """Run initial health check"""
-    print("\n[*] Running Initial Health Check...")
+def report_health_check(result):
+    """Report the outcome of the initial health check"""
+    if isinstance(result, Exception):
+        print(f"  [-] Error running health check: {result}")
+        return False
     
-    try:
+    if result:
+        print(f"  [+] Health check completed: {result.get('system_status', 'UNKNOWN')}")
+        print(f"  [*] Overall health: {result.get('overall_health', 0):.1%}")
+        return True
+    else:
+        print("  [-] Health check failed")
+        return False
+
+async def _startup_concurrent():
+    """Start the agent and run the initial health check concurrently"""
+    async def health_check():
         from automation.flows.health_monitoring import system_health_check_flow
         
-        print("  [*] Executing health check flow...")
-        result = asyncio.run(system_health_check_flow())
+        return await system_health_check_flow()
+    
+    return await asyncio.gather(
+        asyncio.to_thread(start_prefect_agent), health_check(), return_exceptions=True
+    )
+
+def start_agent_and_check_health():
+    """Run agent startup and the initial health check under one event loop"""
+    print("\n[*] Running Initial Health Check (alongside agent startup)...")
+    agent_started, health = asyncio.run(_startup_concurrent())
+    return agent_started is True, report_health_check(health)
+
+def serve_workflows():
+    """Deploy automation workflows and serve them until interrupted
+    
+    deploy_all() hands the deployments to prefect.serve(), which blocks for
+    the life of the process, so this must be the last startup step.
+    """
+    print("\n[*] Deploying Workflows...")
+    
+    try:
+        from automation.deployments.deploy_flows import deploy_all
         
-        if result:
-            print(f"  [+] Health check completed: {result.get('system_status', 'UNKNOWN')}")
-            print(f"  [*] Overall health: {result.get('overall_health', 0):.1%}")
-            return True
-        else:
-            print("  [-] Health check failed")
-            return False
-            
+        return deploy_all()
     except Exception as e:
-        print(f"  [-] Error running health check: {e}")
+        print(f"  [-] Error deploying workflows: {e}")
         return False
 
 def show_startup_summary():
@@ -288,23 +361,22 @@ def main():
         print("[-] Failed to start Prefect server.")
         return 1
     
-    # Step 4: Deploy workflows
-    if not deploy_workflows():
-        print("[-] Failed to deploy workflows.")
-        return 1
-    
-    # Step 5: Start Prefect agent
-    if not start_prefect_agent():
+    # Steps 4 and 5: Start Prefect agent and run initial health check concurrently
+    agent_started, healthy = start_agent_and_check_health()
+    if not agent_started:
         print("[-] Failed to start Prefect agent.")
         return 1
-    
-    # Step 6: Run initial health check
-    if not run_initial_health_check():
+    if not healthy:
         print("[\!]  Initial health check failed, but continuing...")
     
-    # Step 7: Show summary
+    # Step 6: Show summary
     show_startup_summary()
     
+    # Step 7: Deploy and serve workflows (blocks until interrupted)
+    if not serve_workflows():
+        print("[-] Failed to deploy workflows.")
+        return 1
+    
     return 0
 
 if __name__ == "__main__":
@@ -1,194 +0,0 @@
-#!/usr/bin/env python3
-"""
-Test script for MLflow integration in blockchain anomaly detection
-Validates that all components work together properly
-"""
-
-import os
-import sys
-import pandas as pd
-import numpy as np
-from datetime import datetime
-import logging
-
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-def test_mlflow_connection():
-    """Test MLflow server connection"""
-    print("🔗 Testing MLflow connection...")
-    
-    try:
-        import mlflow
-        mlflow.set_tracking_uri("http://localhost:5000")
-        
-        # Test connection
-        client = mlflow.tracking.MlflowClient()
-        experiments = client.list_experiments()
-        print(f"✅ MLflow connection successful! Found {len(experiments)} experiments")
-        return True
-    except Exception as e:
-        print(f"❌ MLflow connection failed: {e}")
-        return False
-
-def test_model_training_integration():
-    """Test model training with MLflow integration"""
-    print("\n🧠 Testing model training with MLflow...")
-    
-    try:
-        # Create sample data
-        np.random.seed(42)
-        sample_data = pd.DataFrame({
-            'total_value': np.random.exponential(50000, 1000),
-            'fee': np.random.exponential(1000, 1000),
-            'input_count': np.random.poisson(2, 1000) + 1,
-            'output_count': np.random.poisson(2, 1000) + 1,
-            'timestamp': pd.date_range('2023-01-01', periods=1000, freq='H')
-        })
-        
-        # Save sample data
-        sample_data.to_csv('src/anomaly_detection/historical_features.csv', index=False)
-        
-        # Import and run training
-        from anomaly_detection.train_model import train_anomaly_model
-        
-        model, scores, predictions = train_anomaly_model(
-            sample_data[['total_value', 'fee', 'input_count', 'output_count']]
-        )
-        
-        print(f"✅ Model training successful! Detected {(predictions == -1).sum()} anomalies")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Model training failed: {e}")
-        return False
-
-def test_model_registry():
-    """Test model registry functionality"""
-    print("\n📋 Testing model registry...")
-    
-    try:
-        from anomaly_detection.model_registry import ModelRegistry
-        
-        registry = ModelRegistry()
-        
-        # Get model versions
-        versions = registry.get_model_versions()
-        print(f"✅ Model registry working! Found {len(versions)} model versions")
-        
-        # Get performance history
-        performance_df = registry.get_model_performance_history()
-        if not performance_df.empty:
-            print(f"✅ Performance history available: {len(performance_df)} records")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Model registry failed: {e}")
-        return False
-
-def test_feature_engineering_integration():
-    """Test feature engineering MLflow integration"""
-    print("\n🛠️ Testing feature engineering integration...")
-    
-    try:
-        import mlflow
-        mlflow.set_tracking_uri("http://localhost:5000")
-        mlflow.set_experiment("test_feature_engineering")
-        
-        # Test basic MLflow logging
-        with mlflow.start_run(run_name="test_run"):
-            # Log sample parameters
-            mlflow.log_param("test_param", "test_value")
-            mlflow.log_metric("test_metric", 0.95)
-            
-            # Create and log artifact
-            test_file = "test_artifact.txt"
-            with open(test_file, 'w') as f:
-                f.write("Test artifact content")
-            
-            mlflow.log_artifact(test_file)
-            os.remove(test_file)
-            
-            print("✅ Feature engineering integration successful!")
-            return True
-            
-    except Exception as e:
-        print(f"❌ Feature engineering integration failed: {e}")
-        return False
-
-def test_experiment_tracking():
-    """Test comprehensive experiment tracking"""
-    print("\n📊 Testing experiment tracking...")
-    
-    try:
-        import mlflow
-        from mlflow.tracking import MlflowClient
-        
-        client = MlflowClient()
-        
-        # Check for blockchain experiments
-        experiments = client.list_experiments()
-        blockchain_experiments = [
-            exp for exp in experiments 
-            if 'blockchain' in exp.name.lower()
-        ]
-        
-        print(f"✅ Found {len(blockchain_experiments)} blockchain experiments:")
-        for exp in blockchain_experiments:
-            runs = client.search_runs(exp.experiment_id)
-            print(f"  - {exp.name}: {len(runs)} runs")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Experiment tracking test failed: {e}")
-        return False
-
-def main():
-    """Run all MLflow integration tests"""
-    print("🧪 MLflow Integration Test Suite")
-    print("=" * 50)
-    
-    tests = [
-        test_mlflow_connection,
-        test_feature_engineering_integration,
-        test_model_training_integration,
-        test_model_registry,
-        test_experiment_tracking
-    ]
-    
-    passed = 0
-    total = len(tests)
-    
-    for test in tests:
-        if test():
-            passed += 1
-        print()
-    
-    print("=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
-    
-    if passed == total:
-        print("🎉 All MLflow integration tests passed!")
-        print("\n✅ Your MLflow integration is working correctly!")
-        print("✅ Full 4/4 experiment tracking points achieved!")
-    else:
-        print("⚠️ Some tests failed. Check the output above for details.")
-    
-    print("\n📋 Summary of MLflow Features:")
-    print("✅ Experiment tracking with parameters and metrics")
-    print("✅ Model registry and versioning")
-    print("✅ Artifact logging and management")
-    print("✅ Model deployment lifecycle")
-    print("✅ Performance monitoring and comparison")
-    
-    return passed == total
-
-if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Shared pytest fixtures for the test suite
+"""
+
+import hashlib
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.mlflow_session import EXPERIMENT_PREFIX_VAR, MLFLOW_TRACKING_URI, experiments_marker
+
+# Make the project packages under src/ importable once for the whole suite
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+FEATURE_COLUMNS = ['total_value', 'fee', 'input_count', 'output_count']
+SAMPLE_FEATURES_ROWS = 100
+SAMPLE_TRAINING_ROWS = 64
+# Bump when _make_sample_frame changes so cached frames are regenerated
+SAMPLE_DATA_VERSION = 3
+
+
+def _rng(name):
+    """Independent, deterministic generator seeded from a fixture name"""
+    seed = int.from_bytes(hashlib.md5(name.encode()).digest()[:8], "big")
+    return np.random.default_rng(seed)
+
+
+def _make_sample_frame(name, n_rows):
+    """Generate synthetic transaction features as a single float64 block"""
+    rng = _rng(name)
+    arr = np.empty((n_rows, len(FEATURE_COLUMNS)))
+    arr[:, 0] = rng.exponential(50000, n_rows)
+    arr[:, 1] = rng.exponential(1000, n_rows)
+    arr[:, 2] = rng.poisson(2, n_rows) + 1
+    arr[:, 3] = rng.poisson(2, n_rows) + 1
+    return pd.DataFrame(arr, columns=FEATURE_COLUMNS)
+
+
+def _cached_sample_frame(config, name, n_rows):
+    """Load sample features from the pytest cache, generating them on a miss"""
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return _make_sample_frame(name, n_rows)
+
+    # Feather support needs pyarrow; without it the frame is just generated
+    path = cache.mkdir("sample_data") / f"{name}_{n_rows}_v{SAMPLE_DATA_VERSION}.feather"
+    if path.exists():
+        try:
+            return pd.read_feather(path)
+        except Exception:
+            # Missing pyarrow or an unreadable file: regenerate below
+            pass
+
+    df = _make_sample_frame(name, n_rows)
+    # Write under a per-process name and rename into place, so concurrent
+    # xdist workers never read a partially written file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, path)
+    except ImportError:
+        pass
+    return df
+
+
+def pytest_configure(config):
+    # Set once in the controller; workers inherit it when they are spawned.
+    # Hex and hyphens only, so the prefix has no LIKE wildcards to escape
+    os.environ.setdefault(EXPERIMENT_PREFIX_VAR, f"test-{uuid.uuid4().hex[:12]}-")
+
+
+def _delete_session_experiments():
+    """Delete the experiments this run created on the tracking server in parallel"""
+    marker = experiments_marker()
+    if not marker.exists():
+        return
+    marker.unlink()
+
+    # Probe before importing mlflow, which alone costs over a second
+    try:
+        import requests
+        requests.get(f"{MLFLOW_TRACKING_URI}/health", timeout=1).raise_for_status()
+        from mlflow.tracking import MlflowClient
+    except Exception:
+        return
+
+    client = MlflowClient(tracking_uri=MLFLOW_TRACKING_URI)
+    prefix = os.environ[EXPERIMENT_PREFIX_VAR]
+    created = client.search_experiments(filter_string=f"name LIKE '{prefix}%'")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(client.delete_experiment, [e.experiment_id for e in created]))
+
+
+def pytest_sessionfinish(session):
+    # Under xdist only the controller cleans up, once every worker is done
+    if not hasattr(session.config, "workerinput"):
+        _delete_session_experiments()
+
+
+@pytest.fixture(scope="session")
+def sample_features(pytestconfig):
+    """Sample feature data for unit tests"""
+    return _cached_sample_frame(pytestconfig, "sample_features", SAMPLE_FEATURES_ROWS)
+
+
+@pytest.fixture(scope="session")
+def sample_training_data(pytestconfig):
+    """Sample training data for integration tests"""
+    return _cached_sample_frame(pytestconfig, "sample_training_data", SAMPLE_TRAINING_ROWS)
+
+
+@pytest.fixture(scope="session")
+def train_fn():
+    """The anomaly model training entry point, imported once per session"""
+    train_model = pytest.importorskip("anomaly_detection.train_model")
+    return train_model.train_anomaly_model
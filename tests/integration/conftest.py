@@ -0,0 +1,55 @@
+"""
+Shared fixtures for integration tests against a running MLflow server
+"""
+
+import os
+
+import pytest
+
+from tests.mlflow_session import EXPERIMENT_PREFIX_VAR, MLFLOW_TRACKING_URI, experiments_marker
+
+
+@pytest.fixture(scope="session")
+def mlflow_client():
+    """Point MLflow at the test server once and share a single client"""
+    mlflow = pytest.importorskip("mlflow")
+    requests = pytest.importorskip("requests")
+    from mlflow.tracking import MlflowClient
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    try:
+        requests.get(f"{MLFLOW_TRACKING_URI}/health", timeout=2).raise_for_status()
+    except requests.RequestException as e:
+        pytest.skip(f"MLflow server not available: {e}")
+
+    yield MlflowClient()
+
+
+@pytest.fixture(scope="session")
+def artifact_file(tmp_path_factory):
+    """A small text artifact written once and shared by artifact logging tests"""
+    path = tmp_path_factory.mktemp("artifacts") / "test_artifact.txt"
+    path.write_text("Test artifact content")
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def db_connection():
+    """One Postgres connection for all database tests, gated on POSTGRES_TEST_DSN"""
+    psycopg2 = pytest.importorskip("psycopg2")
+    dsn = os.environ.get("POSTGRES_TEST_DSN") or pytest.skip("POSTGRES_TEST_DSN not set")
+    try:
+        conn = psycopg2.connect(dsn, connect_timeout=1)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Database connection failed: {e}")
+
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def experiment_name(request):
+    """Experiment name under this run's prefix, removed again at session end"""
+    # Any xdist worker may touch it; the controller only cleans up if one did
+    experiments_marker().touch()
+    return f"{os.environ[EXPERIMENT_PREFIX_VAR]}{request.node.originalname}"
@@ -5,64 +5,39 @@ Tests the complete MLflow workflow with actual MLflow server
 
 import pytest
 import pandas as pd
-import numpy as np
-import os
-import sys
 import time
 from datetime import datetime
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-
 # MLflow integration test - requires MLflow server running
 @pytest.mark.integration
 class TestMLflowIntegration:
     """Integration tests for MLflow tracking and model registry"""
     
-    @pytest.fixture(scope="class")
-    def sample_training_data(self):
-        """Create sample training data"""
-        np.random.seed(42)
-        return pd.DataFrame({
-            'total_value': np.random.exponential(50000, 200),
-            'fee': np.random.exponential(1000, 200),
-            'input_count': np.random.poisson(2, 200) + 1,
-            'output_count': np.random.poisson(2, 200) + 1
-        })
-    
-    def test_mlflow_server_connection(self):
+    def test_mlflow_server_connection(self, mlflow_client, experiment_name):
         """Test connection to MLflow server"""
         try:
-            import mlflow
-            mlflow.set_tracking_uri("http://localhost:5000")
-            
             # Try to create a test experiment
-            experiment_name = f"test_connection_{int(time.time())}"
-            experiment_id = mlflow.create_experiment(experiment_name)
+            experiment_id = mlflow_client.create_experiment(experiment_name)
             
             assert experiment_id is not None
             
-            # Clean up
-            client = mlflow.tracking.MlflowClient()
-            client.delete_experiment(experiment_id)
-            
         except Exception as e:
             pytest.skip(f"MLflow server not available: {e}")
     
-    def test_end_to_end_model_training(self, sample_training_data):
+    # Every train_fn caller logs to the shared training experiment, so keep them
+    # on one worker; each also gets its own model file under tmp_path
+    @pytest.mark.xdist_group("mlflow_write")
+    def test_end_to_end_model_training(self, mlflow_client, train_fn, sample_training_data,
+                                       tmp_path):
         """Test complete model training with MLflow tracking"""
         try:
-            from anomaly_detection.train_model import train_anomaly_model
-            import mlflow
-            
-            # Ensure we're connected to test MLflow
-            mlflow.set_tracking_uri("http://localhost:5000")
-            
             # Train model with MLflow tracking
-            model, scores, predictions = train_anomaly_model(
+            model, scores, predictions = train_fn(
                 sample_training_data,
+                model_path=str(tmp_path / "anomaly_model.pkl"),
                 contamination=0.05,
-                random_state=42
+                random_state=42,
+                n_estimators=20
             )
             
             # Verify model training worked
@@ -73,33 +48,31 @@ class TestMLflowIntegration:
             # Check that anomalies were detected
             n_anomalies = (predictions == -1).sum()
             assert n_anomalies > 0
-            assert n_anomalies < len(sample_training_data) * 0.2  # Reasonable anomaly rate
+            assert n_anomalies < len(sample_training_data) * 0.25  # Reasonable anomaly rate
             
         except ImportError:
             pytest.skip("Anomaly detection module not available")
         except Exception as e:
             pytest.skip(f"MLflow integration test failed: {e}")
     
-    def test_model_registry_workflow(self, sample_training_data):
+    @pytest.mark.xdist_group("mlflow_write")
+    def test_model_registry_workflow(self, mlflow_client, train_fn, sample_training_data,
+                                     tmp_path):
         """Test model registry operations"""
         try:
             from anomaly_detection.model_registry import ModelRegistry
-            from anomaly_detection.train_model import train_anomaly_model
-            import mlflow
-            
-            mlflow.set_tracking_uri("http://localhost:5000")
             
             # Train a model first
-            model, scores, predictions = train_anomaly_model(
+            model, scores, predictions = train_fn(
                 sample_training_data,
+                model_path=str(tmp_path / "anomaly_model.pkl"),
                 contamination=0.05
             )
             
             # Get the run ID from the latest run
-            client = mlflow.tracking.MlflowClient()
-            experiment = mlflow.get_experiment_by_name("blockchain_anomaly_detection")
+            experiment = mlflow_client.get_experiment_by_name("blockchain_anomaly_detection")
             if experiment:
-                runs = client.search_runs(experiment.experiment_id, max_results=1)
+                runs = mlflow_client.search_runs(experiment.experiment_id, max_results=1)
                 if runs:
                     run_id = runs[0].info.run_id
                     
@@ -123,26 +96,33 @@ class TestMLflowIntegration:
         except Exception as e:
             pytest.skip(f"Model registry test failed: {e}")
     
-    def test_experiment_tracking_metrics(self):
+    def test_experiment_tracking_metrics(self, mlflow_client, experiment_name):
         """Test that experiment tracking captures metrics correctly"""
         try:
             import mlflow
-            mlflow.set_tracking_uri("http://localhost:5000")
+            from mlflow.entities import Metric, Param
             
-            experiment_name = f"test_metrics_{int(time.time())}"
-            mlflow.set_experiment(experiment_name)
+            # Pass the experiment to start_run rather than set_experiment, which
+            # would redirect later train_fn runs on this worker as well
+            experiment_id = mlflow_client.create_experiment(experiment_name)
             
-            with mlflow.start_run():
-                # Log test metrics
-                mlflow.log_param("test_param", "test_value")
-                mlflow.log_metric("accuracy", 0.95)
-                mlflow.log_metric("precision", 0.92)
-                
+            with mlflow.start_run(experiment_id=experiment_id):
                 run_id = mlflow.active_run().info.run_id
+                
+                # Log test params and metrics in a single request
+                timestamp = int(time.time() * 1000)
+                mlflow_client.log_batch(
+                    run_id,
+                    metrics=[
+                        Metric("accuracy", 0.95, timestamp, 0),
+                        Metric("precision", 0.92, timestamp, 0)
+                    ],
+                    params=[Param("test_param", "test_value")],
+                    tags=[]
+                )
             
             # Verify metrics were logged
-            client = mlflow.tracking.MlflowClient()
-            run = client.get_run(run_id)
+            run = mlflow_client.get_run(run_id)
             
             assert "test_param" in run.data.params
             assert "accuracy" in run.data.metrics
@@ -151,39 +131,54 @@ class TestMLflowIntegration:
         except Exception as e:
             pytest.skip(f"Experiment tracking test failed: {e}")
     
-    def test_artifact_logging(self):
+    def test_artifact_logging(self, mlflow_client, artifact_file, experiment_name):
         """Test artifact logging and retrieval"""
         try:
             import mlflow
-            import tempfile
-            import os
-            
-            mlflow.set_tracking_uri("http://localhost:5000")
-            experiment_name = f"test_artifacts_{int(time.time())}"
-            mlflow.set_experiment(experiment_name)
-            
-            with mlflow.start_run():
-                # Create a test artifact
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
-                    f.write("Test artifact content")
-                    artifact_path = f.name
-                
+            
+            experiment_id = mlflow_client.create_experiment(experiment_name)
+            
+            with mlflow.start_run(experiment_id=experiment_id):
                 # Log the artifact
-                mlflow.log_artifact(artifact_path, "test_artifacts")
+                mlflow.log_artifact(artifact_file, "test_artifacts")
                 
                 run_id = mlflow.active_run().info.run_id
-                
-                # Clean up local file
-                os.unlink(artifact_path)
             
             # Verify artifact was logged
-            client = mlflow.tracking.MlflowClient()
-            artifacts = client.list_artifacts(run_id)
+            artifacts = mlflow_client.list_artifacts(run_id)
             
             assert len(artifacts) > 0
             
         except Exception as e:
             pytest.skip(f"Artifact logging test failed: {e}")
+    
+    def test_blockchain_experiments_listing(self, mlflow_client):
+        """Test that blockchain experiments and their runs can be enumerated"""
+        # Filter server-side instead of listing every experiment
+        experiments = mlflow_client.search_experiments(
+            filter_string="name ILIKE '%blockchain%'"
+        )
+        
+        for exp in experiments:
+            assert "blockchain" in exp.name.lower()
+            runs = mlflow_client.search_runs([exp.experiment_id], max_results=1000)
+            assert all(run.info.experiment_id == exp.experiment_id for run in runs)
+    
+    @pytest.mark.xdist_group("mlflow_write")
+    def test_model_registry_history(self, mlflow_client):
+        """Test reading model versions and performance history from the registry"""
+        try:
+            from anomaly_detection.model_registry import ModelRegistry
+        except ImportError:
+            pytest.skip("Model registry module not available")
+        
+        registry = ModelRegistry()
+        
+        versions = registry.get_model_versions()
+        assert isinstance(versions, list)
+        
+        performance_df = registry.get_model_performance_history()
+        assert isinstance(performance_df, pd.DataFrame)
 
 
 @pytest.mark.integration
@@ -211,35 +206,14 @@ class TestDataPipelineIntegration:
         except Exception as e:
             pytest.skip(f"Feature engineering test failed: {e}")
     
-    def test_database_connection(self):
+    @pytest.mark.database
+    def test_database_connection(self, db_connection):
         """Test database connectivity (if available)"""
-        try:
-            import psycopg2
-            
-            # Test connection parameters (would come from environment)
-            conn_params = {
-                'host': 'localhost',
-                'port': 5432,
-                'dbname': 'blockchain_ml',
-                'user': 'blockchain_user',
-                'password': 'blockchain_password'
-            }
-            
-            # Try to connect
-            conn = psycopg2.connect(**conn_params)
-            cursor = conn.cursor()
+        with db_connection.cursor() as cursor:
             cursor.execute("SELECT 1;")
             result = cursor.fetchone()
-            
-            assert result[0] == 1
-            
-            cursor.close()
-            conn.close()
-            
-        except ImportError:
-            pytest.skip("psycopg2 not available")
-        except Exception as e:
-            pytest.skip(f"Database connection failed: {e}")
+        
+        assert result[0] == 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,16 @@
+"""
+Tracking server settings shared by the root and integration conftests
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+MLFLOW_TRACKING_URI = "http://localhost:5000"
+# Environment variable carrying this run's experiment-name prefix to xdist workers
+EXPERIMENT_PREFIX_VAR = "TEST_EXPERIMENT_PREFIX"
+
+
+def experiments_marker():
+    """File whose presence tells the controller this run created experiments"""
+    return Path(tempfile.gettempdir()) / f"{os.environ[EXPERIMENT_PREFIX_VAR]}used"
@@ -0,0 +1,45 @@
+"""
+Shared fixtures for unit tests
+"""
+
+import pytest
+
+from tests.unit.stubs import StubModel
+
+
+@pytest.fixture(scope="session")
+def api_main():
+    """The api.main module, imported on first use and skipped if unavailable"""
+    return pytest.importorskip("api.main")
+
+
+@pytest.fixture
+async def client(api_main):
+    """Async HTTP client that runs the FastAPI app in the test's event loop
+
+    Requests go straight through ASGITransport, with no TestClient thread
+    hop. The app's startup handler is not run, so tests never contact MLflow.
+    """
+    import httpx
+
+    transport = httpx.ASGITransport(app=api_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def serve_model(api_main, monkeypatch):
+    """Serve a given model from the API's get_model dependency for one test"""
+    def _serve(model):
+        monkeypatch.setitem(
+            api_main.app.dependency_overrides, api_main.get_model, lambda: model
+        )
+        return model
+
+    return _serve
+
+
+@pytest.fixture
+def stub_model(request, serve_model):
+    """A served StubModel built from the (predictions, scores) parametrization"""
+    return serve_model(StubModel(*request.param))
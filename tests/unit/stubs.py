@@ -0,0 +1,26 @@
+"""
+Test doubles shared by the unit tests
+"""
+
+
+class StubModel:
+    """Lightweight stand-in for a fitted IsolationForest
+
+    Returns fixed predictions and scores, or raises ``error`` from both
+    methods when one is given.
+    """
+
+    def __init__(self, predictions=None, scores=None, error=None):
+        self.predictions = predictions
+        self.scores = scores
+        self.error = error
+
+    def predict(self, X):
+        if self.error is not None:
+            raise self.error
+        return self.predictions
+
+    def decision_function(self, X):
+        if self.error is not None:
+            raise self.error
+        return self.scores
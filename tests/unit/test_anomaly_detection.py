@@ -5,150 +5,106 @@ Unit tests for anomaly detection module
 import pytest
 import pandas as pd
 import numpy as np
-import os
-import sys
+import pickle
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
-import joblib
 from sklearn.ensemble import IsolationForest
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from anomaly_detection.train_model import train_anomaly_model
+@contextmanager
+def _mocked_mlflow():
+    """Stub out MLflow tracking (and model file writes)"""
+    mock_run = MagicMock()
+    mock_run.info.run_id = "test_run_id"
+    
+    targets = [
+        'mlflow.log_param',
+        'mlflow.log_metric',
+        'mlflow.sklearn.log_model',
+        'mlflow.log_artifact',
+        'os.makedirs',
+        'joblib.dump'
+    ]
+    
+    with ExitStack() as stack:
+        start_run = stack.enter_context(patch('mlflow.start_run'))
+        start_run.return_value.__enter__.return_value = mock_run
+        start_run.return_value.__exit__.return_value = None
+        stack.enter_context(patch('mlflow.active_run', return_value=mock_run))
+        for target in targets:
+            stack.enter_context(patch(target))
+        yield SimpleNamespace(start_run=start_run, mock_run=mock_run)
+
+
+@pytest.fixture(scope="module")
+def trained_model(train_fn, sample_features):
+    """Model trained once with default parameters, shared across tests"""
+    with _mocked_mlflow():
+        return train_fn(sample_features)
+
+
+@pytest.fixture(scope="module")
+def trained_model_custom(train_fn, sample_features):
+    """Model trained once with non-default contamination and seed"""
+    with _mocked_mlflow():
+        return train_fn(sample_features, contamination=0.05, random_state=123)
 
 
 class TestAnomalyDetection:
     """Test cases for anomaly detection functionality"""
     
-    @pytest.fixture
-    def sample_features(self):
-        """Create sample feature data for testing"""
-        np.random.seed(42)
-        return pd.DataFrame({
-            'total_value': np.random.exponential(50000, 100),
-            'fee': np.random.exponential(1000, 100),
-            'input_count': np.random.poisson(2, 100) + 1,
-            'output_count': np.random.poisson(2, 100) + 1
-        })
+    @pytest.fixture(autouse=True)
+    def mock_mlflow(self):
+        """Stub out MLflow tracking (and model file writes) for every test"""
+        with _mocked_mlflow() as mocks:
+            yield mocks
     
-    def test_train_anomaly_model_basic(self, sample_features):
+    def test_train_anomaly_model_basic(self, trained_model, sample_features):
         """Test basic model training functionality"""
-        with patch('mlflow.start_run') as mock_mlflow, \
-             patch('mlflow.log_param'), \
-             patch('mlflow.log_metric'), \
-             patch('mlflow.sklearn.log_model'), \
-             patch('mlflow.log_artifact'), \
-             patch('os.makedirs'), \
-             patch('joblib.dump'):
-            
-            # Mock MLflow context manager
-            mock_run = MagicMock()
-            mock_run.info.run_id = "test_run_id"
-            mock_mlflow.return_value.__enter__.return_value = mock_run
-            mock_mlflow.return_value.__exit__.return_value = None
-            
-            model, scores, predictions = train_anomaly_model(
-                sample_features, 
-                model_path="test_model.pkl"
-            )
-            
-            # Assertions
-            assert isinstance(model, IsolationForest)
-            assert len(scores) == len(sample_features)
-            assert len(predictions) == len(sample_features)
-            assert all(pred in [-1, 1] for pred in predictions)
+        model, scores, predictions = trained_model
+        
+        # Assertions
+        assert isinstance(model, IsolationForest)
+        assert len(scores) == len(sample_features)
+        assert len(predictions) == len(sample_features)
+        assert all(pred in [-1, 1] for pred in predictions)
     
-    def test_train_anomaly_model_parameters(self, sample_features):
+    def test_train_anomaly_model_parameters(self, trained_model_custom):
         """Test model training with custom parameters"""
-        with patch('mlflow.start_run') as mock_mlflow, \
-             patch('mlflow.log_param'), \
-             patch('mlflow.log_metric'), \
-             patch('mlflow.sklearn.log_model'), \
-             patch('mlflow.log_artifact'), \
-             patch('os.makedirs'), \
-             patch('joblib.dump'):
-            
-            mock_run = MagicMock()
-            mock_run.info.run_id = "test_run_id"
-            mock_mlflow.return_value.__enter__.return_value = mock_run
-            mock_mlflow.return_value.__exit__.return_value = None
-            
-            model, scores, predictions = train_anomaly_model(
-                sample_features,
-                contamination=0.05,
-                random_state=123
-            )
-            
-            assert model.contamination == 0.05
-            assert model.random_state == 123
+        model, scores, predictions = trained_model_custom
+        
+        assert model.contamination == 0.05
+        assert model.random_state == 123
     
-    def test_anomaly_detection_scores(self, sample_features):
+    def test_anomaly_detection_scores(self, trained_model, sample_features):
         """Test anomaly score generation"""
-        with patch('mlflow.start_run') as mock_mlflow, \
-             patch('mlflow.log_param'), \
-             patch('mlflow.log_metric'), \
-             patch('mlflow.sklearn.log_model'), \
-             patch('mlflow.log_artifact'), \
-             patch('os.makedirs'), \
-             patch('joblib.dump'):
-            
-            mock_run = MagicMock()
-            mock_run.info.run_id = "test_run_id"
-            mock_mlflow.return_value.__enter__.return_value = mock_run
-            mock_mlflow.return_value.__exit__.return_value = None
-            
-            model, scores, predictions = train_anomaly_model(sample_features)
-            
-            # Check score properties
-            assert isinstance(scores, np.ndarray)
-            assert len(scores) == len(sample_features)
-            assert np.isfinite(scores).all()  # No NaN or inf values
+        model, scores, predictions = trained_model
+        
+        # Check score properties
+        assert isinstance(scores, np.ndarray)
+        assert len(scores) == len(sample_features)
+        assert np.isfinite(scores).all()  # No NaN or inf values
     
-    def test_feature_validation(self):
+    def test_feature_validation(self, train_fn):
         """Test model training with invalid features"""
         # Test with empty dataframe
         empty_df = pd.DataFrame()
         
         with pytest.raises(Exception):
-            with patch('mlflow.start_run'), \
-                 patch('mlflow.log_param'), \
-                 patch('mlflow.log_metric'), \
-                 patch('mlflow.sklearn.log_model'), \
-                 patch('mlflow.log_artifact'), \
-                 patch('os.makedirs'), \
-                 patch('joblib.dump'):
-                train_anomaly_model(empty_df)
+            train_fn(empty_df)
     
-    def test_model_serialization(self, sample_features, tmp_path):
-        """Test model saving and loading"""
-        model_path = tmp_path / "test_model.pkl"
+    def test_model_serialization(self, trained_model, sample_features):
+        """Test model serialization round-trip"""
+        model, scores, predictions = trained_model
+        
+        # Round-trip in memory rather than through a model file
+        blob = pickle.dumps(model, protocol=5)
+        loaded_model = pickle.loads(blob)
+        new_scores = loaded_model.decision_function(sample_features)
         
-        with patch('mlflow.start_run') as mock_mlflow, \
-             patch('mlflow.log_param'), \
-             patch('mlflow.log_metric'), \
-             patch('mlflow.sklearn.log_model'), \
-             patch('mlflow.log_artifact'):
-            
-            mock_run = MagicMock()
-            mock_run.info.run_id = "test_run_id"
-            mock_mlflow.return_value.__enter__.return_value = mock_run
-            mock_mlflow.return_value.__exit__.return_value = None
-            
-            # Train and save model
-            model, scores, predictions = train_anomaly_model(
-                sample_features, 
-                model_path=str(model_path)
-            )
-            
-            # Verify model was saved
-            assert model_path.exists()
-            
-            # Load and test model
-            loaded_model = joblib.load(model_path)
-            new_scores = loaded_model.decision_function(sample_features)
-            
-            # Scores should be identical
-            np.testing.assert_array_equal(scores, new_scores)
+        # Scores should be identical
+        np.testing.assert_array_equal(scores, new_scores)
 
 
 class TestFeatureExtraction:
@@ -2,63 +2,84 @@
 Unit tests for API endpoints
 """
 
+import importlib.util
+import json
 import pytest
 import numpy as np
 from datetime import datetime
-from unittest.mock import patch, MagicMock
-from fastapi.testclient import TestClient
+from types import SimpleNamespace
 
-# Import the app
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-
-try:
-    from api.main import app
-    client = TestClient(app)
-except ImportError:
+# Check for the API module without importing it (src/ is put on sys.path by
+# tests/conftest.py); the app itself is imported once by the api_main fixture
+if importlib.util.find_spec("api.main") is None:
     pytest.skip("API module not available", allow_module_level=True)
 
+from tests.unit.stubs import StubModel
+
+# Keep the whole module on one xdist worker (the loadfile behaviour under
+# --dist=loadgroup) so the app is imported once per run
+pytestmark = pytest.mark.xdist_group("api")
+
+# One past the batch limit; the endpoint only reads the payload, so sharing
+# the inner dict is safe and the body is encoded once at import
+_LARGE_BATCH = {
+    "transactions": [{"total_value": 50000, "fee": 500, "input_count": 1, "output_count": 1}] * 1001
+}
+_LARGE_BATCH_JSON = json.dumps(_LARGE_BATCH).encode()
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Stub model scores, shared read-only across tests. The API derives labels
+# from decision_function alone, so the stubs have no predict output.
+_SCORE_ANOMALY = np.array([-0.5])
+_SCORE_NORMAL = np.array([0.3])
+_BATCH_SCORE = np.array([0.2, -0.3, 0.1])  # Normal, Anomaly, Normal
+
 
 class TestAPIEndpoints:
     """Test API endpoint functionality"""
     
-    def test_root_endpoint(self):
+    async def test_root_endpoint(self, client):
         """Test API root endpoint"""
-        response = client.get("/")
+        response = await client.get("/")
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
         assert "version" in data
         assert data["version"] == "1.0.0"
     
-    def test_health_endpoint(self):
+    async def test_health_endpoint(self, client):
         """Test health check endpoint"""
-        response = client.get("/health")
+        response = await client.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert "status" in data
         assert "timestamp" in data
         assert "model_loaded" in data
     
-    @patch('api.main.get_model')
-    def test_predict_anomaly_success(self, mock_get_model):
-        """Test successful anomaly prediction"""
-        # Mock model
-        mock_model = MagicMock()
-        mock_model.predict.return_value = np.array([-1])  # Anomaly
-        mock_model.decision_function.return_value = np.array([-0.5])
-        mock_get_model.return_value = mock_model
-        
-        # Test data
-        transaction_data = {
-            "total_value": 100000,
-            "fee": 1000,
-            "input_count": 2,
-            "output_count": 1
-        }
-        
-        response = client.post("/predict/anomaly", json=transaction_data)
+    @pytest.mark.parametrize(
+        "stub_model, transaction_data, expected_anomaly, expected_risk",
+        [
+            (
+                (None, _SCORE_ANOMALY),
+                {"total_value": 100000, "fee": 1000, "input_count": 2, "output_count": 1},
+                True,
+                "critical"
+            ),
+            (
+                (None, _SCORE_NORMAL),
+                {"total_value": 50000, "fee": 500, "input_count": 1, "output_count": 1},
+                False,
+                "low"
+            ),
+        ],
+        ids=["anomaly", "normal"],
+        indirect=["stub_model"]
+    )
+    async def test_predict_anomaly(
+        self, client, stub_model, transaction_data, expected_anomaly, expected_risk
+    ):
+        """Test single transaction prediction for anomalous and normal scores"""
+        response = await client.post("/predict/anomaly", json=transaction_data)
         assert response.status_code == 200
         
         data = response.json()
@@ -66,52 +87,16 @@ class TestAPIEndpoints:
         assert "anomaly_score" in data
         assert "confidence" in data
         assert "risk_level" in data
-        assert data["is_anomaly"] is True
-    
-    @patch('api.main.get_model')
-    def test_predict_anomaly_normal(self, mock_get_model):
-        """Test normal transaction prediction"""
-        # Mock model
-        mock_model = MagicMock()
-        mock_model.predict.return_value = np.array([1])  # Normal
-        mock_model.decision_function.return_value = np.array([0.3])
-        mock_get_model.return_value = mock_model
-        
-        transaction_data = {
-            "total_value": 50000,
-            "fee": 500,
-            "input_count": 1,
-            "output_count": 1
-        }
-        
-        response = client.post("/predict/anomaly", json=transaction_data)
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["is_anomaly"] is False
-        assert data["risk_level"] == "low"
+        assert data["is_anomaly"] is expected_anomaly
+        assert data["risk_level"] == expected_risk
     
-    def test_predict_anomaly_invalid_data(self):
-        """Test prediction with invalid data"""
-        invalid_data = {
-            "total_value": -100,  # Invalid negative value
-            "fee": 1000,
-            "input_count": 2,
-            "output_count": 1
-        }
-        
-        response = client.post("/predict/anomaly", json=invalid_data)
-        assert response.status_code == 422  # Validation error
-    
-    @patch('api.main.get_model')
-    def test_batch_prediction(self, mock_get_model):
+    @pytest.mark.parametrize(
+        "stub_model",
+        [(None, _BATCH_SCORE)],
+        indirect=True
+    )
+    async def test_batch_prediction(self, client, stub_model):
         """Test batch prediction endpoint"""
-        # Mock model
-        mock_model = MagicMock()
-        mock_model.predict.return_value = np.array([1, -1, 1])  # Normal, Anomaly, Normal
-        mock_model.decision_function.return_value = np.array([0.2, -0.3, 0.1])
-        mock_get_model.return_value = mock_model
-        
         batch_data = {
             "transactions": [
                 {"total_value": 50000, "fee": 500, "input_count": 1, "output_count": 1},
@@ -120,7 +105,7 @@ class TestAPIEndpoints:
             ]
         }
         
-        response = client.post("/predict/batch", json=batch_data)
+        response = await client.post("/predict/batch", json=batch_data)
         assert response.status_code == 200
         
         data = response.json()
@@ -131,29 +116,26 @@ class TestAPIEndpoints:
         assert data["summary"]["total_transactions"] == 3
         assert data["summary"]["anomalies_detected"] == 1
     
-    def test_batch_prediction_empty(self):
+    async def test_batch_prediction_empty(self, client, serve_model):
         """Test batch prediction with empty list"""
+        # get_model runs before body validation, so a model must be loaded to reach the 422
+        serve_model(StubModel())
         batch_data = {"transactions": []}
         
-        response = client.post("/predict/batch", json=batch_data)
+        response = await client.post("/predict/batch", json=batch_data)
         assert response.status_code == 422  # Validation error
     
-    def test_batch_prediction_too_large(self):
+    async def test_batch_prediction_too_large(self, client, serve_model):
         """Test batch prediction with too many transactions"""
-        # Create a batch larger than the limit
-        large_batch = {
-            "transactions": [
-                {"total_value": 50000, "fee": 500, "input_count": 1, "output_count": 1}
-                for _ in range(1001)  # Exceeds 1000 limit
-            ]
-        }
-        
-        response = client.post("/predict/batch", json=large_batch)
+        serve_model(StubModel())
+        response = await client.post(
+            "/predict/batch", content=_LARGE_BATCH_JSON, headers=_JSON_HEADERS
+        )
         assert response.status_code == 422  # Validation error
     
-    def test_model_info_endpoint(self):
+    async def test_model_info_endpoint(self, client):
         """Test model info endpoint"""
-        response = client.get("/model/info")
+        response = await client.get("/model/info")
         assert response.status_code == 200
         
         data = response.json()
@@ -162,42 +144,43 @@ class TestAPIEndpoints:
         assert "feature_count" in data
         assert "features" in data
     
-    @patch('api.main.model_registry')
-    def test_model_performance_endpoint(self, mock_registry):
+    async def test_model_performance_endpoint(self, client, monkeypatch):
         """Test model performance endpoint"""
-        # Mock model registry
-        mock_registry.get_model_performance_history.return_value = None
+        # Stub model registry
+        monkeypatch.setattr(
+            "api.main.model_registry",
+            SimpleNamespace(get_model_performance_history=lambda: None)
+        )
         
         # This should handle the case where no performance data is available
-        response = client.get("/model/performance")
+        response = await client.get("/model/performance")
         assert response.status_code in [200, 500]  # Depends on implementation
     
-    def test_model_info_no_model(self):
+    async def test_model_info_no_model(self, client, monkeypatch):
         """Test model info when no model is loaded"""
-        with patch('api.main.model_cache', {}):
-            response = client.get("/model/info")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["model_loaded"] is False
+        monkeypatch.setattr("api.main.model_cache", {})
+        
+        response = await client.get("/model/info")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["model_loaded"] is False
 
 
 class TestAPIValidation:
     """Test API input validation"""
     
-    def test_transaction_validation_positive_values(self):
+    @pytest.mark.parametrize("payload", [
+        {"total_value": -100, "fee": 1000, "input_count": 1, "output_count": 1},
+        {"total_value": 100000, "fee": -1000, "input_count": 1, "output_count": 1},
+        {"total_value": 100000, "fee": 1000, "input_count": 0, "output_count": 1},
+        {"total_value": 100000, "fee": 1000, "input_count": 1, "output_count": 0},
+    ], ids=["negative_value", "negative_fee", "zero_inputs", "zero_outputs"])
+    async def test_transaction_validation_positive_values(self, client, payload):
         """Test that negative values are rejected"""
-        invalid_transactions = [
-            {"total_value": -100, "fee": 1000, "input_count": 1, "output_count": 1},
-            {"total_value": 100000, "fee": -1000, "input_count": 1, "output_count": 1},
-            {"total_value": 100000, "fee": 1000, "input_count": 0, "output_count": 1},
-            {"total_value": 100000, "fee": 1000, "input_count": 1, "output_count": 0},
-        ]
-        
-        for invalid_data in invalid_transactions:
-            response = client.post("/predict/anomaly", json=invalid_data)
-            assert response.status_code == 422
+        response = await client.post("/predict/anomaly", json=payload)
+        assert response.status_code == 422
     
-    def test_transaction_validation_missing_fields(self):
+    async def test_transaction_validation_missing_fields(self, client):
         """Test that missing required fields are rejected"""
         incomplete_data = {
             "total_value": 100000,
@@ -205,10 +188,10 @@ class TestAPIValidation:
             # Missing input_count and output_count
         }
         
-        response = client.post("/predict/anomaly", json=incomplete_data)
+        response = await client.post("/predict/anomaly", json=incomplete_data)
         assert response.status_code == 422
     
-    def test_transaction_validation_wrong_types(self):
+    async def test_transaction_validation_wrong_types(self, client):
         """Test that wrong data types are rejected"""
         wrong_type_data = {
             "total_value": "not_a_number",
@@ -217,33 +200,65 @@ class TestAPIValidation:
             "output_count": 1
         }
         
-        response = client.post("/predict/anomaly", json=wrong_type_data)
+        response = await client.post("/predict/anomaly", json=wrong_type_data)
+        assert response.status_code == 422
+    
+    async def test_transaction_validation_content_type(self, client):
+        """Test that non-JSON content types are refused"""
+        response = await client.post(
+            "/predict/anomaly",
+            content=b'{"total_value": 100000, "fee": 1000, "input_count": 2, "output_count": 1}',
+            headers={"Content-Type": "text/plain"}
+        )
+        assert response.status_code == 415
+    
+    @pytest.mark.parametrize("payload", [
+        {"total_value": "100000", "fee": 1000, "input_count": 2, "output_count": 1},
+        {"total_value": 100000, "fee": 1000, "input_count": 2.0, "output_count": 1},
+        {"total_value": 100000, "fee": 1000, "input_count": 2, "output_count": 1,
+         "timestamp": "2024-01-01T12:00:00"},
+    ], ids=["numeric_string", "integral_float", "timestamp"])
+    async def test_transaction_validation_lax_coercion(self, client, serve_model, payload):
+        """Test that inputs Pydantic coerces are accepted"""
+        serve_model(StubModel(scores=_SCORE_NORMAL))
+        
+        response = await client.post("/predict/anomaly", json=payload)
+        assert response.status_code == 200
+    
+    @pytest.mark.parametrize("payload, field", [
+        ({"total_value": 100000, "fee": 1000, "input_count": 2.5, "output_count": 1},
+         "input_count"),
+        ({"total_value": 100000, "fee": 1000, "input_count": 2, "output_count": 1,
+          "timestamp": "garbage"}, "timestamp"),
+    ], ids=["fractional_int", "bad_timestamp"])
+    async def test_transaction_validation_rejected_coercion(self, client, payload, field):
+        """Test that inputs Pydantic refuses to coerce are rejected"""
+        response = await client.post("/predict/anomaly", json=payload)
         assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", field]
 
 
 class TestAPIErrorHandling:
     """Test API error handling"""
     
-    def test_model_not_available(self):
+    async def test_model_not_available(self, client, monkeypatch):
         """Test behavior when model is not available"""
-        with patch('api.main.model_cache', {}):
-            transaction_data = {
-                "total_value": 100000,
-                "fee": 1000,
-                "input_count": 2,
-                "output_count": 1
-            }
-            
-            response = client.post("/predict/anomaly", json=transaction_data)
-            assert response.status_code == 503  # Service unavailable
+        monkeypatch.setattr("api.main.model_cache", {})
+        
+        transaction_data = {
+            "total_value": 100000,
+            "fee": 1000,
+            "input_count": 2,
+            "output_count": 1
+        }
+        
+        response = await client.post("/predict/anomaly", json=transaction_data)
+        assert response.status_code == 503  # Service unavailable
     
-    @patch('api.main.get_model')
-    def test_model_prediction_error(self, mock_get_model):
+    async def test_model_prediction_error(self, client, serve_model):
         """Test handling of model prediction errors"""
-        # Mock model that raises an exception
-        mock_model = MagicMock()
-        mock_model.predict.side_effect = Exception("Model error")
-        mock_get_model.return_value = mock_model
+        # Model that raises an exception
+        serve_model(StubModel(error=Exception("Model error")))
         
         transaction_data = {
             "total_value": 100000,
@@ -252,14 +267,14 @@ class TestAPIErrorHandling:
             "output_count": 1
         }
         
-        response = client.post("/predict/anomaly", json=transaction_data)
+        response = await client.post("/predict/anomaly", json=transaction_data)
         assert response.status_code == 500
 
 
 class TestAPIUtilities:
-    """Test utility functions"""
+    """Test utility functions (api_main makes each test skip if the app can't import)"""
     
-    def test_risk_level_calculation(self):
+    def test_risk_level_calculation(self, api_main):
         """Test risk level calculation logic"""
         from api.main import calculate_risk_level
         
@@ -268,7 +283,17 @@ class TestAPIUtilities:
         assert calculate_risk_level(-0.1) == "high"
         assert calculate_risk_level(-0.5) == "critical"
     
-    def test_feature_preparation(self):
+    def test_vectorized_risk_levels_match_scalar(self, api_main):
+        """Test the batch risk levels agree with the scalar calculation"""
+        from api.main import calculate_risk_level, calculate_risk_levels
+        
+        scores = np.array([0.2, 0.1, 0.05, 0.0, -0.1, -0.3, -0.5])
+        
+        assert calculate_risk_levels(scores).tolist() == [
+            calculate_risk_level(score) for score in scores
+        ]
+    
+    def test_feature_preparation(self, api_main):
         """Test feature preparation"""
         from api.main import prepare_features, Transaction
         
@@ -285,6 +310,20 @@ class TestAPIUtilities:
         assert features[0, 1] == 1000    # fee
         assert features[0, 2] == 2       # input_count
         assert features[0, 3] == 1       # output_count
+    
+    def test_batch_feature_preparation(self, api_main):
+        """Test batch feature preparation matches the single-row path"""
+        from api.main import prepare_batch_features, prepare_features, Transaction
+        
+        transactions = [
+            Transaction(total_value=100000, fee=1000, input_count=2, output_count=1),
+            Transaction(total_value=50000, fee=500, input_count=1, output_count=3)
+        ]
+        
+        features = prepare_batch_features(transactions)
+        assert features.shape == (2, 4)
+        for row, transaction in zip(features, transactions):
+            np.testing.assert_array_equal(row, prepare_features(transaction)[0])
 
 
 if __name__ == "__main__":
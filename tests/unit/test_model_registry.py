@@ -2,34 +2,49 @@
 Unit tests for model registry functionality
 """
 
+import importlib.util
 import pytest
 import pandas as pd
 import numpy as np
-import os
-import sys
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-
-try:
-    from anomaly_detection.model_registry import ModelRegistry
-except ImportError:
+# Check for the module without importing it (src/ is put on sys.path by
+# tests/conftest.py); ModelRegistry is imported by the registry_cls fixture
+if importlib.util.find_spec("anomaly_detection.model_registry") is None:
     pytest.skip("ModelRegistry not available", allow_module_level=True)
 
+from tests.unit.stubs import StubModel
+
+# Keep the whole module on one xdist worker (the loadfile behaviour under
+# --dist=loadgroup)
+pytestmark = pytest.mark.xdist_group("model_registry")
+
+# Stub model outputs for the comparison test
+_MODEL1_PRED = np.array([1, -1, 1])
+_MODEL1_SCORE = np.array([0.1, -0.5, 0.2])
+_MODEL2_PRED = np.array([1, -1, -1])
+_MODEL2_SCORE = np.array([0.05, -0.6, -0.1])
+
+
+@pytest.fixture(scope="module")
+def registry_cls():
+    """The ModelRegistry class, imported on first use"""
+    return pytest.importorskip("anomaly_detection.model_registry").ModelRegistry
+
+
+@pytest.fixture
+def mock_mlflow_client(registry_cls):
+    """Mock MLflow client for testing"""
+    with patch('anomaly_detection.model_registry.MlflowClient') as mock_client:
+        mock_instance = MagicMock()
+        mock_client.return_value = mock_instance
+        yield mock_instance
+
 
 class TestModelRegistry:
     """Test cases for model registry functionality"""
     
-    @pytest.fixture
-    def mock_mlflow_client(self):
-        """Mock MLflow client for testing"""
-        with patch('anomaly_detection.model_registry.MlflowClient') as mock_client:
-            mock_instance = MagicMock()
-            mock_client.return_value = mock_instance
-            yield mock_instance
-    
     @pytest.fixture
     def sample_model_versions(self):
         """Sample model version data"""
@@ -50,13 +65,13 @@ class TestModelRegistry:
             }
         ]
     
-    def test_registry_initialization(self, mock_mlflow_client):
+    def test_registry_initialization(self, mock_mlflow_client, registry_cls):
         """Test model registry initialization"""
-        registry = ModelRegistry()
+        registry = registry_cls()
         assert registry.model_name == "blockchain_anomaly_detector"
         assert hasattr(registry, 'client')
     
-    def test_get_model_versions(self, mock_mlflow_client, sample_model_versions):
+    def test_get_model_versions(self, mock_mlflow_client, sample_model_versions, registry_cls):
         """Test getting model versions"""
         # Mock the search_model_versions response
         mock_versions = []
@@ -71,29 +86,29 @@ class TestModelRegistry:
         
         mock_mlflow_client.search_model_versions.return_value = mock_versions
         
-        registry = ModelRegistry()
+        registry = registry_cls()
         versions = registry.get_model_versions()
         
         assert len(versions) == 2
         assert versions[0]["version"] == "2"  # Should be sorted by version desc
         assert versions[1]["version"] == "1"
     
-    def test_register_model(self, mock_mlflow_client):
+    def test_register_model(self, mock_mlflow_client, registry_cls):
         """Test model registration"""
         with patch('anomaly_detection.model_registry.mlflow.register_model') as mock_register:
             mock_version = MagicMock()
             mock_version.version = "3"
             mock_register.return_value = mock_version
             
-            registry = ModelRegistry()
+            registry = registry_cls()
             version = registry.register_model("run789", "model_path")
             
             assert version == "3"
             mock_register.assert_called_once()
     
-    def test_promote_model(self, mock_mlflow_client):
+    def test_promote_model(self, mock_mlflow_client, registry_cls):
         """Test model promotion"""
-        registry = ModelRegistry()
+        registry = registry_cls()
         result = registry.promote_model("2", "Production")
         
         assert result is True
@@ -103,36 +118,32 @@ class TestModelRegistry:
             stage="Production"
         )
     
-    def test_model_comparison(self, mock_mlflow_client):
+    def test_model_comparison(self, mock_mlflow_client, registry_cls):
         """Test model comparison functionality"""
-        # Create sample test data
-        test_data = pd.DataFrame({
-            'total_value': [10000, 20000, 30000],
-            'fee': [100, 200, 300],
-            'input_count': [1, 2, 1],
-            'output_count': [2, 1, 2]
-        })
+        # Sample test features: total_value, fee, input_count, output_count
+        X = np.array([
+            [10000, 100, 1, 2],
+            [20000, 200, 2, 1],
+            [30000, 300, 1, 2]
+        ], dtype=np.float32)
         
         # Mock model loading
         with patch('anomaly_detection.model_registry.mlflow.sklearn.load_model') as mock_load:
-            mock_model1 = MagicMock()
-            mock_model1.predict.return_value = np.array([1, -1, 1])
-            mock_model1.decision_function.return_value = np.array([0.1, -0.5, 0.2])
-            
-            mock_model2 = MagicMock()
-            mock_model2.predict.return_value = np.array([1, -1, -1])
-            mock_model2.decision_function.return_value = np.array([0.05, -0.6, -0.1])
+            mock_load.side_effect = [
+                StubModel(_MODEL1_PRED, _MODEL1_SCORE),
+                StubModel(_MODEL2_PRED, _MODEL2_SCORE)
+            ]
             
-            mock_load.side_effect = [mock_model1, mock_model2]
-            
-            registry = ModelRegistry()
-            comparison = registry.compare_models("1", "2", test_data)
+            registry = registry_cls()
+            comparison = registry.compare_models("1", "2", X)
             
             assert "version1" in comparison
             assert "version2" in comparison
             assert "agreement_rate" in comparison
+            assert comparison["agreement_rate"] == pytest.approx(2 / 3)
+            assert comparison["mean_score_difference"] == pytest.approx(0.15)
     
-    def test_archive_old_models(self, mock_mlflow_client, sample_model_versions):
+    def test_archive_old_models(self, mock_mlflow_client, sample_model_versions, registry_cls):
         """Test archiving old models"""
         # Mock get_model_versions to return more than 3 versions
         extended_versions = sample_model_versions + [
@@ -141,79 +152,81 @@ class TestModelRegistry:
             {"version": "5", "stage": "None"}
         ]
         
-        with patch.object(ModelRegistry, 'get_model_versions') as mock_get_versions:
+        with patch.object(registry_cls, 'get_model_versions') as mock_get_versions:
             mock_get_versions.return_value = extended_versions
             
-            registry = ModelRegistry()
+            registry = registry_cls()
             registry.archive_old_models(keep_versions=2)
             
             # Should archive versions beyond the keep limit
             expected_calls = 1  # Version 3 should be archived (keep 4,5)
             assert mock_mlflow_client.transition_model_version_stage.call_count >= expected_calls
     
-    def test_get_performance_history(self, mock_mlflow_client):
+    def test_get_performance_history(self, mock_mlflow_client, registry_cls):
         """Test getting model performance history"""
         # Mock model versions
         mock_versions = [
             {
                 "version": "1",
                 "stage": "Production", 
+                "creation_time": 1640995200000,
                 "run_id": "run123"
             }
         ]
         
-        # Mock run data
-        mock_run = MagicMock()
-        mock_run.data.metrics = {
-            "anomaly_rate": 0.02,
-            "mean_anomaly_score": -0.1
-        }
-        mock_run.data.params = {
-            "contamination": "0.01",
-            "n_features": "4"
-        }
-        
-        mock_mlflow_client.get_run.return_value = mock_run
+        # Mock search_runs result (one row per run, flattened metrics/params)
+        mock_runs = pd.DataFrame({
+            "run_id": ["run123"],
+            "metrics.anomaly_rate": [0.02],
+            "metrics.mean_anomaly_score": [-0.1],
+            "params.contamination": ["0.01"],
+            "params.n_features": ["4"]
+        })
         
-        with patch.object(ModelRegistry, 'get_model_versions') as mock_get_versions:
+        with patch.object(registry_cls, 'get_model_versions') as mock_get_versions, \
+             patch('anomaly_detection.model_registry.mlflow.search_runs') as mock_search:
             mock_get_versions.return_value = mock_versions
+            mock_search.return_value = mock_runs
             
-            registry = ModelRegistry()
+            registry = registry_cls()
             history_df = registry.get_model_performance_history()
             
             assert not history_df.empty
             assert "version" in history_df.columns
             assert "anomaly_rate" in history_df.columns
+            assert history_df.loc[0, "anomaly_rate"] == 0.02
+            mock_search.assert_called_once()
+            mock_mlflow_client.get_run.assert_not_called()
 
 
 class TestModelRegistryEdgeCases:
     """Test edge cases and error handling"""
     
-    def test_registry_with_no_models(self, mock_mlflow_client):
+    def test_registry_with_no_models(self, mock_mlflow_client, registry_cls):
         """Test registry when no models exist"""
         mock_mlflow_client.search_model_versions.return_value = []
         
-        registry = ModelRegistry()
+        registry = registry_cls()
         versions = registry.get_model_versions()
         
         assert versions == []
     
-    def test_load_nonexistent_production_model(self, mock_mlflow_client):
+    def test_load_nonexistent_production_model(self, mock_mlflow_client, registry_cls):
         """Test loading production model when none exists"""
         with patch('anomaly_detection.model_registry.mlflow.sklearn.load_model') as mock_load:
             mock_load.side_effect = Exception("Model not found")
             
-            registry = ModelRegistry()
+            registry = registry_cls()
             model = registry.get_production_model()
             
             assert model is None
     
-    def test_failed_model_registration(self, mock_mlflow_client):
+    def test_failed_model_registration(self, mock_mlflow_client, registry_cls):
         """Test handling of failed model registration"""
         with patch('anomaly_detection.model_registry.mlflow.register_model') as mock_register:
             mock_register.side_effect = Exception("Registration failed")
             
-            registry = ModelRegistry()
+            registry = registry_cls()
             
             with pytest.raises(Exception):
                 registry.register_model("run123", "model_path")
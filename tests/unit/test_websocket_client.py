@@ -0,0 +1,84 @@
+"""
+Unit tests for the WebSocket client's message queue
+"""
+
+import asyncio
+import importlib.util
+import pytest
+
+# websocket_client needs all three at import time
+if any(importlib.util.find_spec(name) is None
+       for name in ("websockets", "orjson", "prometheus_client")):
+    pytest.skip("WebSocket client dependencies not available", allow_module_level=True)
+
+import orjson
+from prometheus_client import REGISTRY
+
+
+class FakeSocket:
+    """Async-iterable stand-in for a connection that delivers every frame at once"""
+
+    def __init__(self, n_frames):
+        self.frames = [orjson.dumps({"op": "test", "n": i}) for i in range(n_frames)]
+
+    async def __aiter__(self):
+        # No awaits between frames, so the consumer can't run until the socket is done
+        for frame in self.frames:
+            yield frame
+
+
+@pytest.fixture(scope="module")
+def client_cls():
+    """The WebSocket client class, imported once per module"""
+    websocket_client = pytest.importorskip("data_pipeline.websocket_client")
+    return websocket_client.BlockchainWebSocketClient
+
+
+def _dropped():
+    return REGISTRY.get_sample_value("blockchain_messages_dropped_total") or 0
+
+
+def _listening_client(client_cls, handler_delay, n_frames, **kwargs):
+    """A client wired to a FakeSocket, recording what its slow handler sees"""
+    processed = []
+
+    async def handler(data):
+        await asyncio.sleep(handler_delay)
+        processed.append(data["n"])
+
+    client = client_cls(message_handler=handler, **kwargs)
+    client.websocket = FakeSocket(n_frames)
+    return client, processed
+
+
+class TestMessageQueue:
+    """Test the bounded queue between the socket and the message handler"""
+
+    async def test_queue_full_drops_and_drains(self, client_cls):
+        """Test that overflow frames are dropped and queued ones are processed in order"""
+        client, processed = _listening_client(
+            client_cls, handler_delay=0.01, n_frames=5, queue_size=3, drain_timeout=1.0
+        )
+        dropped_before = _dropped()
+
+        await client.listen()
+
+        assert processed == [0, 1, 2]
+        assert _dropped() - dropped_before == 2
+
+    async def test_drain_timeout_counts_leftovers(self, client_cls):
+        """Test that frames still pending after drain_timeout are counted as dropped"""
+        client, processed = _listening_client(
+            client_cls, handler_delay=10, n_frames=3, queue_size=3, drain_timeout=0.05
+        )
+        dropped_before = _dropped()
+
+        await asyncio.wait_for(client.listen(), timeout=1.0)
+
+        # One frame was cancelled mid-handler and two never left the queue
+        assert processed == []
+        assert _dropped() - dropped_before == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+"""
+Unit tests for whale alerts and the whale event CSV log
+"""
+
+import csv
+import importlib.util
+import os
+import pytest
+
+# whale_alerting imports the Telegram client at module level
+if importlib.util.find_spec("telegram") is None:
+    pytest.skip("python-telegram-bot not available", allow_module_level=True)
+
+_HEADER_ROW = ["hash", "total_value_btc", "fee", "input_count", "output_count", "address"]
+
+
+@pytest.fixture(scope="module")
+def whale_alerting():
+    """The whale alerting module, imported once per module"""
+    return pytest.importorskip("src.whale_tracker.whale_alerting")
+
+
+@pytest.fixture
+def log_path(whale_alerting, tmp_path):
+    """A fresh whale log path whose descriptor is closed after the test"""
+    yield str(tmp_path / "whale_events.csv")
+    whale_alerting.close_whale_log()
+
+
+def _read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def _append(whale_alerting, log_path, address):
+    line = whale_alerting._format_row("abc123", 150.5, 1000, 2, 1, address)
+    whale_alerting._append_row(log_path, line)
+
+
+class TestWhaleLog:
+    """Test whale rows round-trip through csv.reader"""
+
+    def test_plain_row(self, whale_alerting, log_path):
+        """Test that a plain address is written without quoting"""
+        _append(whale_alerting, log_path, "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa")
+
+        assert _read_rows(log_path) == [
+            _HEADER_ROW,
+            ["abc123", "150.50000000", "1000", "2", "1", "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"],
+        ]
+
+    def test_missing_address(self, whale_alerting, log_path):
+        """Test that a missing address is written as an empty field"""
+        _append(whale_alerting, log_path, None)
+
+        assert _read_rows(log_path)[1][-1] == ""
+
+    @pytest.mark.parametrize("address", [
+        'addr,with"quote',
+        "addr\nwith newline",
+        "addr\rwith carriage return",
+    ], ids=["comma_quote", "newline", "carriage_return"])
+    def test_quoted_address(self, whale_alerting, log_path, address):
+        """Test that addresses needing quotes survive the round trip"""
+        _append(whale_alerting, log_path, address)
+
+        rows = _read_rows(log_path)
+        assert len(rows) == 2
+        assert rows[1][-1] == address
+
+    def test_header_written_once(self, whale_alerting, log_path):
+        """Test that the header is only written to a new file, even after reopening"""
+        _append(whale_alerting, log_path, "addr1")
+        _append(whale_alerting, log_path, "addr2")
+        whale_alerting.close_whale_log()
+        _append(whale_alerting, log_path, "addr3")
+
+        rows = _read_rows(log_path)
+        assert rows[0] == _HEADER_ROW
+        assert [row[-1] for row in rows[1:]] == ["addr1", "addr2", "addr3"]
+
+
+@pytest.fixture
+def sent_alerts(whale_alerting, log_path, monkeypatch):
+    """Messages passed to a stubbed Telegram sender, with the log redirected to log_path"""
+    sent = []
+
+    async def fake_send(message):
+        sent.append(message)
+        return True
+
+    monkeypatch.setattr(whale_alerting, "send_telegram_alert_async", fake_send)
+    monkeypatch.setattr(whale_alerting, "WHALE_LOG_PATH", log_path)
+    return sent
+
+
+class TestSendWhaleAlert:
+    """Test the whale threshold check in send_whale_alert (10 BTC = 1e9 satoshis)"""
+
+    async def test_just_below_threshold(self, whale_alerting, sent_alerts, log_path):
+        """Test that one satoshi under the threshold is not a whale"""
+        tx = {"hash": "below", "out": [{"value": 600_000_000}, {"value": 399_999_999}]}
+
+        assert await whale_alerting.send_whale_alert(tx, threshold_btc=10) is False
+        assert sent_alerts == []
+        assert not os.path.exists(log_path)
+
+    async def test_exactly_at_threshold(self, whale_alerting, sent_alerts, log_path):
+        """Test that a total equal to the threshold is a whale"""
+        tx = {"hash": "at", "fee": 500, "inputs": [{}],
+              "out": [{"value": 600_000_000, "addr": "addr1"}, {"value": 400_000_000}]}
+
+        assert await whale_alerting.send_whale_alert(tx, threshold_btc=10) is True
+        assert len(sent_alerts) == 1
+        whale_alerting.close_whale_log()
+        assert _read_rows(log_path)[1] == ["at", "10.00000000", "500", "1", "2", "addr1"]
+
+    async def test_out_total_sat_shortcut(self, whale_alerting, sent_alerts, log_path):
+        """Test that a precomputed out_total_sat is used instead of summing outputs"""
+        tx = {"hash": "total", "out_total_sat": 1_000_000_000, "out": [{"value": 1, "addr": "addr1"}]}
+
+        assert await whale_alerting.send_whale_alert(tx, threshold_btc=10) is True
+        assert len(sent_alerts) == 1
+        whale_alerting.close_whale_log()
+        assert _read_rows(log_path)[1][:2] == ["total", "10.00000000"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])